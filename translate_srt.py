@@ -1,207 +1,516 @@
 import os
 import re
+import json
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import argparse
 import time
+import threading
 import spacy
 from pathlib import Path
-
-def read_srt(file_path):
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_SEPARATOR = '%%'
+BATCH_INSTRUCTION = f"""The input contains multiple subtitle segments separated by lines containing only {BATCH_SEPARATOR}.
+Translate each segment separated by {BATCH_SEPARATOR} and return them in the same order, separated by {BATCH_SEPARATOR}.
+Return exactly as many segments as you received."""
+
+# The merge conditions only need the tagger, attribute ruler (for POS) and parser
+SPACY_DISABLED_COMPONENTS = ['ner', 'lemmatizer']
+SPACY_BATCH_SIZE = 256
+
+# Files whose first subtitles nearly all end a sentence are left unmerged
+SEGMENTED_SAMPLE_SIZE = 50
+SEGMENTED_RATIO = 0.9
+
+_NLP = None
+_NLP_LOCK = threading.Lock()
+
+class RateLimiter:
+    """Allow at most `rate` requests per second to start, measured over a rolling window
+
+    Rates below one request per second widen the window, e.g. 0.5 allows one request every 2 seconds.
+    """
+
+    def __init__(self, rate):
+        self.capacity = max(1, int(rate))
+        self.window = self.capacity / rate
+        self._starts = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= self.window:
+                    self._starts.popleft()
+                if len(self._starts) < self.capacity:
+                    self._starts.append(now)
+                    return
+                wait_time = self.window - (now - self._starts[0])
+            time.sleep(wait_time)
+
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+class BackoffRetry(Retry):
+    """urllib3 Retry that waits `initial_delay`, then doubles it, before each retry
+
+    Retry-After is still honoured. Every wait is logged, and each retry takes a
+    permit from the rate limiter like the first attempt does.
+    """
+
+    def __init__(self, *args, initial_delay=1, rate_limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial_delay = initial_delay
+        self.rate_limiter = rate_limiter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.initial_delay = self.initial_delay
+        retry.rate_limiter = self.rate_limiter
+        return retry
+
+    def get_backoff_time(self):
+        if not self.history:
+            return 0
+        return self.initial_delay * 2 ** (len(self.history) - 1)
+
+    def sleep(self, response=None):
+        retry_after = None
+        if response is not None and self.respect_retry_after_header:
+            retry_after = self.get_retry_after(response)
+        wait_time = retry_after if retry_after is not None else self.get_backoff_time()
+        print(f"Request failed, waiting {wait_time} seconds before retrying... (Retry {len(self.history)})")
+
+        super().sleep(response)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+def create_session(pool_size, max_retries=5, initial_delay=1, rate_limiter=None):
+    """Create an HTTP session that keeps connections to the API alive between requests
+
+    Failed requests are retried by urllib3 after waiting 1x, 2x, 4x... `initial_delay`,
+    or as long as the Retry-After header asks.
+    """
+    retry = BackoffRetry(
+        total=max_retries - 1,  # max_retries counts attempts, including the first one
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=['POST'],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        initial_delay=initial_delay,
+        rate_limiter=rate_limiter
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size * 2, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+def parse_srt_block(lines):
+    if len(lines) >= 3:
+        return {
+            'index': lines[0],
+            'timestamp': lines[1],
+            'text': ' '.join(lines[2:])
+        }
+    return None
+
+def iter_srt(file_path):
+    """Yield subtitle blocks while reading the SRT file line by line"""
     with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-
-    blocks = content.strip().split('\n\n')
-    srt_data = []
-
-    for block in blocks:
-        lines = block.split('\n')
-        if len(lines) >= 3:
-            index = lines[0]
-            timestamp = lines[1]
-            text = ' '.join(lines[2:])
-            srt_data.append({
-                'index': index,
-                'timestamp': timestamp,
-                'text': text
-            })
+        lines = []
+        for line in file:
+            line = line.rstrip('\n')
+            if line.strip():
+                lines.append(line)
+                continue
 
+            block = parse_srt_block(lines)
+            if block:
+                yield block
+            lines = []
+
+        block = parse_srt_block(lines)
+        if block:
+            yield block
+
+def _get_nlp():
+    """Load the English spaCy model once per process"""
+    global _NLP
+    with _NLP_LOCK:
+        if _NLP is None:
+            _NLP = spacy.load('en_core_web_sm', disable=SPACY_DISABLED_COMPONENTS)
+    return _NLP
+
+def is_sentence_break(current_text, next_text):
+    """Cheap checks for subtitle pairs that are never merged, so they don't need parsing"""
+    return (not current_text or not next_text or
+            # New sentence after a full stop
+            (current_text.endswith('.') and next_text[0].isupper()) or
+            # Separate quoted dialogue
+            (current_text.endswith('"') and next_text.startswith('"')))
+
+def extract_features(doc):
+    """Collect the token attributes the merge conditions need in a single pass over the doc"""
+    if len(doc) == 0:
+        return None
+
+    features = {
+        'length': len(doc),
+        'first_text_lower': doc[0].text.lower(),
+        'first_tag': doc[0].tag_,
+        'last_text': doc[-1].text,
+        'last_pos': doc[-1].pos_,
+        'last_dep': doc[-1].dep_,
+        'has_root': False,
+        'has_root_verb': False,
+        'has_aux': False,
+        'has_complement': False,
+        'object_heads': set()
+    }
+    for token in doc:
+        dep = token.dep_
+        if dep == 'ROOT':
+            features['has_root'] = True
+            if token.pos_ == 'VERB':
+                features['has_root_verb'] = True
+        elif dep == 'aux':
+            features['has_aux'] = True
+        if dep in ('dobj', 'attr', 'prep'):
+            features['has_complement'] = True
+        if dep in ('pobj', 'dobj', 'attr'):
+            features['object_heads'].add(token.head.i)
+
+    return features
+
+def should_merge(current_text, next_text, current, following):
+    """Decide whether the next subtitle continues the current one
+
+    `current` and `following` are the extract_features() results for both subtitles,
+    so every check is a constant-time lookup.
+    """
+    last_pos = current['last_pos']
+    ends_with_period = current_text.endswith('.')
+
+    # Special cases: Avoid incorrect merging
+    # Avoid merging obvious new sentences and quoted dialogue
+    if is_sentence_break(current_text, next_text):
+        return False
+
+    # Avoid merging independent parallel clauses
+    if following['first_text_lower'] in ('and', 'or', 'but') and current['last_text'].endswith('.'):
+        return False
+
+    # Avoid merging complete independent sentences
+    if ends_with_period and current['has_root'] and following['has_root']:
+        return False
+
+    # Determine merge conditions
+    # Condition 1 and 2: Current sentence ends with preposition, particle, determiner or article
+    if last_pos in ('ADP', 'PART', 'DET'):
+        return True
+
+    # Condition 3: Current sentence ends with specific conjunctions
+    if last_pos == 'CCONJ' and current['last_text'].lower() not in ('and', 'or', 'but'):
+        return True
+
+    # Condition 7: Current text has no ending punctuation and next segment starts with lowercase
+    if current_text[-1] not in '.!?,"' and next_text[0].islower():
+        return True
+
+    # Condition 5: Next sentence starts with present or past participle
+    if following['first_tag'] in ('VBG', 'VBN') and not ends_with_period:
+        return True
+
+    # Condition 4: Current sentence is the beginning of a clause but incomplete
+    if current['last_dep'] in ('mark', 'prep') and not current['has_root']:
+        return True
+
+    # Condition 6: Current sentence has no complete predicate verb
+    if not current['has_root_verb']:
+        return True
+
+    # Condition 9: Check for incomplete verb phrases
+    if last_pos == 'VERB' and current['has_aux'] and not current['has_complement']:
+        return True
+
+    # Condition 8: Check for split phrases
+    return current['length'] - 1 in following['object_heads']
+
+def is_sentence_segmented(srt_data):
+    """Check whether the subtitles already hold one sentence each"""
+    sample = srt_data[:SEGMENTED_SAMPLE_SIZE]
+    if not sample:
+        return False
+    terminal = sum(1 for block in sample if block['text'].rstrip()[-1:] in ('.', '!', '?'))
+    return terminal / len(sample) > SEGMENTED_RATIO
+
+def renumber_subtitles(srt_data):
+    for idx, item in enumerate(srt_data, 1):
+        item['index'] = str(idx)
     return srt_data
 
 def combine_continuous_subtitles(srt_data):
     """Use spaCy for intelligent subtitle merging"""
-    # Load English model
-    nlp = spacy.load('en_core_web_sm')
+    # Already one sentence per subtitle, nothing to merge
+    if is_sentence_segmented(srt_data):
+        print("Subtitles are already sentence-segmented, skipping merge")
+        return renumber_subtitles([block.copy() for block in srt_data])
+
+    # Load English model, reused across calls
+    nlp = _get_nlp()
+
+    # Only parse subtitles that belong to a pair the cheap checks can't decide
+    texts = [block['text'].strip() for block in srt_data]
+    breaks = [is_sentence_break(texts[j], texts[j + 1]) for j in range(len(texts) - 1)]
+    needs_parse = [(j > 0 and not breaks[j - 1]) or (j < len(breaks) and not breaks[j])
+                   for j in range(len(texts))]
+    parsed_docs = nlp.pipe((text for text, needed in zip(texts, needs_parse) if needed),
+                           batch_size=SPACY_BATCH_SIZE)
+    features = [extract_features(next(parsed_docs)) if needed else None for needed in needs_parse]
 
     combined_data = []
     i = 0
 
     while i < len(srt_data):
         current = srt_data[i].copy()
-        current_text = current['text'].strip()
-
-        # Check if there is a next subtitle
-        if i + 1 < len(srt_data):
-            next_text = srt_data[i + 1]['text'].strip()
-
-            # Use spaCy to analyze current and next text
-            current_doc = nlp(current_text)
-            next_doc = nlp(next_text)
-
-            should_combine = False
-
-            if len(current_doc) > 0 and len(next_doc) > 0:
-                last_token = current_doc[-1]
-                first_token = next_doc[0]
-
-                # Determine merge conditions
-                should_combine = any([
-                    # Condition 1: Current sentence ends with preposition or particle
-                    last_token.pos_ in ['ADP', 'PART'],
-
-                    # Condition 2: Current sentence ends with determiner or article
-                    last_token.pos_ == 'DET',
-
-                    # Condition 3: Current sentence ends with specific conjunctions
-                    last_token.pos_ == 'CCONJ' and last_token.text.lower() not in ['and', 'or', 'but'],
-
-                    # Condition 4: Current sentence is the beginning of a clause but incomplete
-                    (last_token.dep_ in ['mark', 'prep'] and
-                     not any(t.dep_ == 'ROOT' for t in current_doc)),
-
-                    # Condition 5: Next sentence starts with present or past participle
-                    first_token.tag_ in ['VBG', 'VBN'] and not current_text.endswith('.'),
+        current_text = texts[i]
 
-                    # Condition 6: Current sentence has no complete predicate verb
-                    not any(t.dep_ == 'ROOT' and t.pos_ == 'VERB' for t in current_doc),
+        # Check if there is a next subtitle that could continue this one
+        if i + 1 < len(srt_data) and not breaks[i]:
+            next_text = texts[i + 1]
 
-                    # Condition 7: Current text has no ending punctuation and next segment starts with lowercase
-                    (not current_text[-1] in '.!?,"' and next_text[0].islower()),
+            current_features = features[i]
+            next_features = features[i + 1]
 
-                    # Condition 8: Check for split phrases
-                    any(t.dep_ in ['pobj', 'dobj', 'attr'] and t.head.i == len(current_doc)-1
-                        for t in next_doc),
-
-                    # Condition 9: Check for incomplete verb phrases
-                    (last_token.pos_ == 'VERB' and
-                     any(t.dep_ == 'aux' for t in current_doc) and
-                     not any(t.dep_ in ['dobj', 'attr', 'prep'] for t in current_doc))
-                ])
-
-                # Special cases: Avoid incorrect merging
-                should_not_combine = any([
-                    # Avoid merging independent parallel clauses
-                    first_token.text.lower() in ['and', 'or', 'but'] and
-                    last_token.text.endswith('.'),
-
-                    # Avoid merging obvious new sentences
-                    next_text[0].isupper() and current_text.endswith('.'),
-
-                    # Avoid merging quoted dialogue
-                    current_text.endswith('"') and next_text.startswith('"'),
-
-                    # Avoid merging complete independent sentences
-                    current_text.endswith('.') and
-                    any(t.dep_ == 'ROOT' for t in current_doc) and
-                    any(t.dep_ == 'ROOT' for t in next_doc)
-                ])
-
-                if should_combine and not should_not_combine:
-                    # Merge text
-                    current['text'] = f"{current_text} {next_text}"
-                    # Update timestamp
-                    current_time = current['timestamp']
-                    next_time = srt_data[i + 1]['timestamp']
-                    current['timestamp'] = f"{current_time.split(' --> ')[0]} --> {next_time.split(' --> ')[1]}"
-                    i += 1  # Skip next subtitle
+            if (current_features and next_features and
+                    should_merge(current_text, next_text, current_features, next_features)):
+                # Merge text
+                current['text'] = f"{current_text} {next_text}"
+                # Update timestamp
+                current_time = current['timestamp']
+                next_time = srt_data[i + 1]['timestamp']
+                current['timestamp'] = f"{current_time.split(' --> ')[0]} --> {next_time.split(' --> ')[1]}"
+                i += 1  # Skip next subtitle
 
         combined_data.append(current)
         i += 1
 
     # Renumber indices
-    for idx, item in enumerate(combined_data, 1):
-        item['index'] = str(idx)
-
-    return combined_data
-
-def translate_text(api_key, text, model, system_prompt, temperature, max_retries=5, initial_delay=1):
-    delay = initial_delay
-
-    for attempt in range(max_retries):
-        try:
-            headers = {
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
+    return renumber_subtitles(combined_data)
+
+def encode_json(data):
+    """Serialize a request body, using orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+def decode_json(content):
+    """Parse a response body, using orjson when it is installed"""
+    if orjson:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def translate_text(api_key, text, model, system_prompt, temperature, rate_limiter=None, session=None,
+                   prompt_cache_key=None, instructions=None):
+    """Translate text with one API request; retries are handled by the session's adapter
+
+    `instructions` is sent as a second system message so `system_prompt` stays an identical prefix.
+    Returns None if the translation failed.
+    """
+    http = session or requests
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json'
+    }
+
+    data = {
+        'model': model,
+        'messages': [
+            {
+                'role': 'system',
+                'content': system_prompt
+            },
+            {
+                'role': 'user',
+                'content': text
             }
-
-            data = {
-                'model': model,
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': system_prompt
-                    },
-                    {
-                        'role': 'user',
-                        'content': text
-                    }
-                ],
-                'temperature': temperature
-            }
-
-            response = requests.post(
-                'https://api.x.ai/v1/chat/completions',
-                headers=headers,
-                json=data
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content'].strip()
-            elif response.status_code == 429:  # Rate limit error
-                if attempt < max_retries - 1:
-                    # Check for Retry-After header
-                    retry_after = response.headers.get('Retry-After')
-                    if retry_after:
-                        wait_time = int(retry_after)
-                    else:
-                        wait_time = delay
-                        delay *= 2  # If no Retry-After, use exponential backoff
-
-                    print(f"Rate limit reached, waiting {wait_time} seconds before retrying... (Attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"Maximum retries ({max_retries}) reached, skipping this text")
-                    return text
-            else:
-                print(f"API request failed: {response.status_code}")
-                print(f"Error message: {response.text}")
-                if attempt < max_retries - 1:
-                    print(f"Waiting {delay} seconds before retrying...")
-                    time.sleep(delay)
-                    delay *= 2
-                    continue
-                return text
-
-        except Exception as e:
-            print(f"Error during translation: {e}")
-            if attempt < max_retries - 1:
-                print(f"Waiting {delay} seconds before retrying...")
-                time.sleep(delay)
-                delay *= 2
-                continue
-            return text
-
-    return text
-
-def write_srt(srt_data, output_file):
-    with open(output_file, 'w', encoding='utf-8') as file:
-        for i, block in enumerate(srt_data):
-            if i > 0:
-                file.write('\n')
-            file.write(f"{block['index']}\n")
-            file.write(f"{block['timestamp']}\n")
-            file.write(f"{block['text']}\n")
+        ],
+        'temperature': temperature
+    }
+    if instructions:
+        data['messages'].insert(1, {
+            'role': 'system',
+            'content': instructions
+        })
+    if prompt_cache_key:
+        data['prompt_cache_key'] = prompt_cache_key
+
+    if rate_limiter:
+        rate_limiter.acquire()
+
+    try:
+        response = http.post(
+            'https://api.x.ai/v1/chat/completions',
+            headers=headers,
+            data=encode_json(data)
+        )
+    except requests.RequestException as e:
+        print(f"Error during translation: {e}")
+        return None
+
+    if response.status_code != 200:
+        print(f"API request failed: {response.status_code}")
+        print(f"Error message: {response.text}")
+        return None
+
+    try:
+        result = decode_json(response.content)
+        return result['choices'][0]['message']['content'].strip()
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        print(f"Error reading translation response: {e}")
+        return None
+
+def group_batches(srt_data, batch_size, batch_chars):
+    """Group subtitle blocks into batches limited by block count and total characters"""
+    batches = []
+    current_batch = []
+    current_chars = 0
+
+    for block in srt_data:
+        text_length = len(block['text'])
+        if current_batch and (len(current_batch) >= batch_size or
+                              current_chars + text_length > batch_chars):
+            batches.append(current_batch)
+            current_batch = []
+            current_chars = 0
+        current_batch.append(block)
+        current_chars += text_length
+
+    if current_batch:
+        batches.append(current_batch)
+
+    return batches
+
+def translate_batch(api_key, batch, model, system_prompt, temperature, rate_limiter=None, session=None,
+                    prompt_cache_key=None):
+    """Translate several subtitle blocks with a single API request
+
+    Returns one translation per block, None where translation failed.
+    """
+    if len(batch) == 1:
+        return [translate_text(api_key, batch[0]['text'], model, system_prompt, temperature,
+                               rate_limiter=rate_limiter, session=session,
+                               prompt_cache_key=prompt_cache_key)]
+
+    text = f"\n{BATCH_SEPARATOR}\n".join(block['text'] for block in batch)
+    translated = translate_text(
+        api_key,
+        text,
+        model,
+        system_prompt,
+        temperature,
+        rate_limiter=rate_limiter,
+        session=session,
+        prompt_cache_key=prompt_cache_key,
+        instructions=BATCH_INSTRUCTION
+    )
+
+    # The request itself failed, retrying each block separately won't help
+    if translated is None:
+        print(f"Batch request failed, {len(batch)} subtitles left untranslated; "
+              f"rerun with --resume to retry them")
+        return [None] * len(batch)
+
+    parts = [part.strip() for part in translated.split(BATCH_SEPARATOR)]
+    if len(parts) == len(batch):
+        return parts
+
+    # Segment count mismatch, fall back to translating each block separately
+    print(f"Batch returned {len(parts)} segments, expected {len(batch)}; translating individually")
+    return [
+        translate_text(api_key, block['text'], model, system_prompt, temperature,
+                       rate_limiter=rate_limiter, session=session,
+                       prompt_cache_key=prompt_cache_key)
+        for block in batch
+    ]
+
+def normalize_text(text):
+    """Normalize subtitle text into a translation cache key"""
+    return text.strip().lower()
+
+def cache_namespace(model, system_prompt):
+    """Identify cached translations produced by a model and system prompt"""
+    prompt_hash = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+    return f"{model}:{prompt_hash}"
+
+def load_translation_cache(cache_file, namespace):
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as file:
+            return json.load(file).get(namespace, {})
+    except (OSError, ValueError) as e:
+        print(f"Error reading cache file: {e}")
+        return {}
+
+def save_translation_cache(cache_file, namespace, cache):
+    data = {}
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            pass  # Overwrite unreadable cache
+
+    data[namespace] = cache
+    with open(cache_file, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+def format_srt_block(block):
+    # A blank line would end the block early, so drop blank lines inside the text
+    text = '\n'.join(line for line in block['text'].splitlines() if line.strip())
+    return f"{block['index']}\n{block['timestamp']}\n{text}\n"
+
+def append_srt(file, srt_data, first):
+    """Append blocks to an open SRT file; `first` tells whether the file is still empty"""
+    if not srt_data:
+        return
+    content = '\n'.join(format_srt_block(block) for block in srt_data)
+    file.write(content if first else f"\n{content}")
+    file.flush()
+
+def read_partial_output(output_file, srt_data):
+    """Return translations an interrupted run already wrote for the leading subtitles
+
+    Subtitles written in their original text, usually because translating them
+    failed, are returned as None so they get translated again.
+    """
+    if not os.path.exists(output_file):
+        return []
+
+    translated = []
+    for block, written in zip(srt_data, iter_srt(output_file)):
+        # Stop at the first subtitle that doesn't line up with this input
+        if written['timestamp'] != block['timestamp']:
+            break
+        if written['text'].strip() == block['text'].strip():
+            translated.append(None)
+        else:
+            translated.append(written['text'])
+
+    # The last block may have been cut off mid-write
+    return translated[:-1]
 
 def main():
     # Default system prompt
@@ -247,10 +556,11 @@ Just provide the direct Chinese translation."""
                       type=float,
                       default=0.7,
                       help='Model temperature value (0.0~1.0, default: 0.7)')
-    parser.add_argument('--delay', '-d',
+    parser.add_argument('--rps',
                       type=float,
                       default=1.0,
-                      help='Delay between translations in seconds (default: 1.0)')
+                      help='Maximum translation requests started per second, e.g. 0.5 for one every '
+                           '2 seconds, 0 for no limit (default: 1.0)')
     parser.add_argument('--max-retries', '-r',
                       type=int,
                       default=5,
@@ -259,6 +569,28 @@ Just provide the direct Chinese translation."""
                       type=float,
                       default=1.0,
                       help='Initial retry delay in seconds (default: 1.0)')
+    parser.add_argument('--concurrency', '-c',
+                      type=int,
+                      default=8,
+                      help='Maximum concurrent translation requests (default: 8)')
+    parser.add_argument('--sort-by-length', '-sl',
+                      action='store_true',
+                      help='Batch subtitles of similar length together instead of in file order')
+    parser.add_argument('--prompt-cache-key', '-pck',
+                      help='Key sent as prompt_cache_key so the provider can reuse the cached system prompt')
+    parser.add_argument('--resume', '-rs',
+                      action='store_true',
+                      help='Keep subtitles already translated in the output file by an interrupted run')
+    parser.add_argument('--cache-file', '-cf',
+                      help='JSON file to reuse translations across runs')
+    parser.add_argument('--batch-size', '-b',
+                      type=int,
+                      default=20,
+                      help='Maximum subtitles per translation request (default: 20)')
+    parser.add_argument('--batch-chars', '-bc',
+                      type=int,
+                      default=2000,
+                      help='Maximum characters per translation request (default: 2000)')
 
     args = parser.parse_args()
 
@@ -278,6 +610,26 @@ Just provide the direct Chinese translation."""
         print("Error: temperature must be between 0.0 and 1.0")
         return
 
+    # Check retry count
+    if args.max_retries < 1:
+        print("Error: maximum retries must be at least 1")
+        return
+
+    # Check concurrency
+    if args.concurrency < 1:
+        print("Error: concurrency must be at least 1")
+        return
+
+    # Check request rate limit
+    if args.rps < 0:
+        print("Error: requests per second must not be negative")
+        return
+
+    # Check batch limits
+    if args.batch_size < 1 or args.batch_chars < 1:
+        print("Error: batch size and batch characters must be at least 1")
+        return
+
     # Check if input file exists
     if not os.path.exists(args.input):
         print(f"Error: input file '{args.input}' does not exist")
@@ -294,33 +646,111 @@ Just provide the direct Chinese translation."""
     print(f"Temperature: {args.temperature}")
     print(f"Maximum retries: {args.max_retries}")
     print(f"Initial retry delay: {args.initial_delay} seconds")
-    srt_data = read_srt(args.input)
+    print(f"Concurrency: {args.concurrency}")
+    print(f"Request rate limit: {args.rps or 'none'} per second")
+    print(f"Batch size: {args.batch_size} subtitles / {args.batch_chars} characters")
+
+    # Read the first subtitles, which decide whether merging needs spaCy at all
+    blocks = iter_srt(args.input)
+    srt_data = list(islice(blocks, SEGMENTED_SAMPLE_SIZE))
+
+    # If merging will run, load the spaCy model while the rest of the file is read;
+    # combine_continuous_subtitles waits for it through _get_nlp()
+    nlp_loader = None
+    if not is_sentence_segmented(srt_data):
+        nlp_loader = ThreadPoolExecutor(max_workers=1)
+        nlp_loader.submit(_get_nlp)
+    srt_data.extend(blocks)
+    if nlp_loader:
+        nlp_loader.shutdown(wait=False)
 
     # Merge subtitles first
     print("Merging continuous subtitles...")
     combined_srt_data = combine_continuous_subtitles(srt_data)
 
-    # Translate merged subtitles
-    total_blocks = len(combined_srt_data)
-    for i, block in enumerate(combined_srt_data, 1):
-        print(f"Translating: [{i}/{total_blocks}] {block['text']}")
-        translated_text = translate_text(
+    # Reuse subtitles written by an interrupted run of the same file
+    resumed = read_partial_output(args.output, combined_srt_data) if args.resume else []
+    resumed_count = sum(1 for translated_text in resumed if translated_text is not None)
+    if resumed:
+        print(f"Resuming with {resumed_count} of {len(resumed)} subtitles already translated in {args.output}")
+    keys = [normalize_text(block['text']) for block in combined_srt_data]
+
+    # Only translate each distinct text once, skipping texts already cached or resumed
+    namespace = cache_namespace(args.model, system_prompt)
+    cache = load_translation_cache(args.cache_file, namespace)
+    # Resumed lines only help within this run: they may come from other settings,
+    # so they are kept out of the cache file
+    resumed_keys = set()
+    for key, translated_text in zip(keys, resumed):
+        if translated_text is not None and key not in cache:
+            cache[key] = translated_text
+            resumed_keys.add(key)
+    pending = {}
+    for block, key in zip(combined_srt_data, keys):
+        if key not in cache and key not in pending:
+            pending[key] = {'text': block['text']}
+    reused_blocks = len(combined_srt_data) - len(pending)
+    if reused_blocks:
+        print(f"Reusing translations for {reused_blocks} duplicate or cached subtitles")
+
+    # Translate remaining subtitles in concurrent batches
+    total_texts = len(pending)
+    pending_blocks = list(pending.values())
+    if args.sort_by_length:
+        # Group subtitles of similar length; translations are mapped back through the cache
+        pending_blocks.sort(key=lambda block: len(block['text']))
+    batches = group_batches(pending_blocks, args.batch_size, args.batch_chars)
+    rate_limiter = RateLimiter(args.rps) if args.rps > 0 else None
+    session = create_session(args.concurrency, args.max_retries, args.initial_delay, rate_limiter)
+
+    def translate(batch):
+        return translate_batch(
             args.api_key,
-            block['text'],
+            batch,
             args.model,
             system_prompt,
             args.temperature,
-            max_retries=args.max_retries,
-            initial_delay=args.initial_delay
+            rate_limiter=rate_limiter,
+            session=session,
+            prompt_cache_key=args.prompt_cache_key
         )
-        block['text'] = translated_text
 
-        # Add delay between translations
-        if i < total_blocks:
-            time.sleep(args.delay)
+    # Write translated subtitles as soon as every subtitle before them is done
+    finished = set(cache)
+    written = 0
+
+    def write_finished(output_file):
+        nonlocal written
+        ready = written
+        while ready < len(combined_srt_data) and keys[ready] in finished:
+            block = combined_srt_data[ready]
+            block['text'] = cache.get(keys[ready], block['text'])
+            ready += 1
+        append_srt(output_file, combined_srt_data[written:ready], first=written == 0)
+        written = ready
+
+    translated_count = 0
+    try:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            write_finished(output_file)
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                for batch, translated_texts in zip(batches, executor.map(translate, batches)):
+                    for block, translated_text in zip(batch, translated_texts):
+                        key = normalize_text(block['text'])
+                        # Failed translations keep the original text and are not cached
+                        if translated_text is not None:
+                            cache[key] = translated_text
+                        finished.add(key)
+                    translated_count += len(batch)
+                    print(f"Translated: [{translated_count}/{total_texts}]")
+                    write_finished(output_file)
+    finally:
+        session.close()
+        if args.cache_file:
+            save_translation_cache(args.cache_file, namespace,
+                                   {key: text for key, text in cache.items() if key not in resumed_keys})
 
-    # Write translated SRT file
-    write_srt(combined_srt_data, args.output)
     print(f"Translation complete! Saved to {args.output}")
 
 if __name__ == "__main__":